@@ -218,9 +218,14 @@ class DetailsDialog(Adw.Dialog):
                 )
                 return
 
-        self.game.name = final_name
-        self.game.developer = final_developer or None
-        self.game.executable = final_executable
+        # Go through update_values so the cached search and sort strings refresh
+        self.game.update_values(
+            {
+                "name": final_name,
+                "developer": final_developer or None,
+                "executable": final_executable,
+            }
+        )
 
         if self.game.game_id in shared.win.game_covers.keys():
             shared.win.game_covers[self.game.game_id].animation = None
@@ -18,6 +18,7 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import shlex
+from functools import cached_property
 from pathlib import Path
 from time import time
 from typing import Any, Optional
@@ -26,8 +27,16 @@ from gi.repository import Adw, GObject, Gtk
 
 from cartridges import shared
 from cartridges.game_cover import GameCover
+from cartridges.utils.relative_date import relative_date
 from cartridges.utils.run_executable import run_executable
 
+# Translated once at import instead of on every date label rebuild
+# The variable is the date when the game was added
+ADDED_TEMPLATE = _("Added: {}")
+# The variable is the date when the game was last played
+LAST_PLAYED_TEMPLATE = _("Last played: {}")
+NEVER = _("Never")
+
 
 # pylint: disable=too-many-instance-attributes
 @Gtk.Template(resource_path=shared.PREFIX + "/gtk/game.ui")
@@ -55,7 +64,10 @@ class Game(Gtk.Box):
     hidden: bool = False
     last_played: int = 0
     name: str
+    name_casefold: str
+    name_sort: str
     developer: Optional[str] = None
+    developer_casefold: Optional[str] = None
     removed: bool = False
     blacklisted: bool = False
     game_cover: GameCover = None
@@ -88,6 +100,30 @@ class Game(Gtk.Box):
                 value = shlex.join(value)
             setattr(self, key, value)
 
+        # Cached for the search filter, which runs for every game on every keystroke
+        self.name_casefold = self.name.casefold()
+        self.developer_casefold = self.developer.casefold() if self.developer else None
+
+        # Cached for the sort function, which runs O(n log n) times per invalidation
+        self.name_sort = self.name_casefold.removeprefix("the ")
+
+        self.reset_date_labels()
+
+    @cached_property
+    def added_label(self) -> str:
+        return ADDED_TEMPLATE.format(relative_date(self.added))
+
+    @cached_property
+    def last_played_label(self) -> str:
+        return LAST_PLAYED_TEMPLATE.format(
+            relative_date(self.last_played) if self.last_played else NEVER
+        )
+
+    def reset_date_labels(self) -> None:
+        """Drop the cached date labels so they are recomputed on next access"""
+        self.__dict__.pop("added_label", None)
+        self.__dict__.pop("last_played_label", None)
+
     def update(self) -> None:
         self.emit("update-ready", {})
 
@@ -113,6 +149,7 @@ class Game(Gtk.Box):
 
     def launch(self) -> None:
         self.last_played = int(time())
+        self.reset_date_labels()
         self.save()
         self.update()
 
@@ -128,7 +165,7 @@ class Game(Gtk.Box):
         self.hidden = not self.hidden
         self.save()
 
-        if shared.win.navigation_view.get_visible_page() == shared.win.details_page:
+        if shared.win.visible_page == shared.win.details_page:
             shared.win.navigation_view.pop()
 
         self.update()
@@ -146,7 +183,7 @@ class Game(Gtk.Box):
         self.save()
         self.update()
 
-        if shared.win.navigation_view.get_visible_page() == shared.win.details_page:
+        if shared.win.visible_page == shared.win.details_page:
             shared.win.navigation_view.pop()
 
         # The variable is the title of the game
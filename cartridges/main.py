@@ -339,7 +339,7 @@ class CartridgesApplication(Adw.Application):
         shared.win.active_game.remove_game()
 
     def on_remove_game_details_view_action(self, *_args: Any) -> None:
-        if shared.win.navigation_view.get_visible_page() == shared.win.details_page:
+        if shared.win.visible_page == shared.win.details_page:
             self.on_remove_game_action()
 
     def search(self, uri: str) -> None:
@@ -286,7 +286,7 @@ class CartridgesPreferences(Adw.PreferencesDialog):
                 game.save()
                 game.update()
 
-        if shared.win.navigation_view.get_visible_page() == shared.win.details_page:
+        if shared.win.visible_page == shared.win.details_page:
             shared.win.navigation_view.pop()
 
         self.add_toast(self.toast)
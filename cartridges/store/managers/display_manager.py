@@ -33,7 +33,18 @@ class DisplayManager(Manager):
 
     def main(self, game: Game, _additional_data: dict) -> None:
         if game.get_parent():
-            game.get_parent().get_parent().remove(game)
+            flow_box = game.get_parent().get_parent()
+            pane = (
+                shared.win.hidden_library_pane
+                if flow_box is shared.win.hidden_library
+                else shared.win.library_pane
+            )
+            pane.games_no -= 1
+            if game.filtered:
+                pane.filtered_no -= 1
+            # Reset so re-inserting the game filters it against its new library
+            game.filtered = False
+            flow_box.remove(game)
             if game.get_parent():
                 game.get_parent().set_child()
 
@@ -58,16 +69,19 @@ class DisplayManager(Manager):
             shared.win.game_covers[game.game_id] = game.game_cover
 
         if (
-            shared.win.navigation_view.get_visible_page() == shared.win.details_page
+            shared.win.visible_page == shared.win.details_page
             and shared.win.active_game == game
         ):
             shared.win.show_details_page(game)
 
         if not game.removed and not game.blacklisted:
-            if game.hidden:
-                shared.win.hidden_library.append(game)
-            else:
-                shared.win.library.append(game)
+            pane = (
+                shared.win.hidden_library_pane
+                if game.hidden
+                else shared.win.library_pane
+            )
+            pane.games_no += 1
+            pane.library.append(game)
             game.get_parent().set_focusable(False)
 
         shared.win.set_library_child()
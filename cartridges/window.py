@@ -17,14 +17,32 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from typing import Any, Optional
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
 
 from gi.repository import Adw, Gio, GLib, Gtk
 
 from cartridges import shared
 from cartridges.game import Game
 from cartridges.game_cover import GameCover
-from cartridges.utils.relative_date import relative_date
+
+
+@dataclass
+class LibraryPane:
+    """The widgets and search state of one of the two library views"""
+
+    library: Gtk.FlowBox
+    overlay: Gtk.Overlay
+    notice_empty: Adw.StatusPage
+    notice_no_results: Adw.StatusPage
+    search_bar: Gtk.SearchBar
+    search_entry: Gtk.SearchEntry
+    menu_button: Gtk.MenuButton
+
+    search_text: str = ""
+    search_timeout_id: int = 0
+    games_no: int = 0
+    filtered_no: int = 0
 
 
 @Gtk.Template(resource_path=shared.PREFIX + "/gtk/window.ui")
@@ -80,10 +98,22 @@ class CartridgesWindow(Adw.ApplicationWindow):
     game_covers: dict = {}
     toasts: dict = {}
     active_game: Game
+    visible_page: Adw.NavigationPage
     details_view_game_cover: Optional[GameCover] = None
     sort_state: str = "last_played"
     filter_state: str = "all"
     source_rows: dict = {}
+    style_handlers: tuple = ()
+
+    # Sort keys per sort mode, precomputed on the games. Numeric fields are
+    # negated for descending modes so that ties still fall back to an A-Z sort.
+    sort_keys: dict = {
+        "a-z": lambda game: (game.name_sort,),
+        "z-a": lambda game: (game.name_sort,),
+        "newest": lambda game: (-game.added, game.name_sort),
+        "oldest": lambda game: (game.added, game.name_sort),
+        "last_played": lambda game: (-game.last_played, game.name_sort),
+    }
 
     def create_source_rows(self) -> None:
         def get_removed(source_id: str) -> Any:
@@ -206,6 +236,7 @@ class CartridgesWindow(Adw.ApplicationWindow):
 
         self.filter_state = value
         self.library.invalidate_filter()
+        self.set_library_child(self.library_pane)
 
         if self.overlay_split_view.get_collapsed():
             self.overlay_split_view.set_show_sidebar(False)
@@ -216,11 +247,35 @@ class CartridgesWindow(Adw.ApplicationWindow):
         self.details_view.set_measure_overlay(self.details_view_toolbar_view, True)
         self.details_view.set_clip_overlay(self.details_view_toolbar_view, False)
 
-        self.library.set_filter_func(self.filter_func)
-        self.hidden_library.set_filter_func(self.filter_func)
+        self.library_pane = LibraryPane(
+            library=self.library,
+            overlay=self.library_overlay,
+            notice_empty=self.notice_empty,
+            notice_no_results=self.notice_no_results,
+            search_bar=self.search_bar,
+            search_entry=self.search_entry,
+            menu_button=self.primary_menu_button,
+        )
+        self.hidden_library_pane = LibraryPane(
+            library=self.hidden_library,
+            overlay=self.hidden_library_overlay,
+            notice_empty=self.hidden_notice_empty,
+            notice_no_results=self.hidden_notice_no_results,
+            search_bar=self.hidden_search_bar,
+            search_entry=self.hidden_search_entry,
+            menu_button=self.hidden_primary_menu_button,
+        )
+        self.panes = {
+            self.library_page: self.library_pane,
+            self.hidden_library_page: self.hidden_library_pane,
+        }
+
+        self.sort_key = self.sort_keys[self.sort_state]
+        self.sort_reversed = False
 
-        self.library.set_sort_func(self.sort_func)
-        self.hidden_library.set_sort_func(self.sort_func)
+        for pane in self.panes.values():
+            pane.library.set_filter_func(self.make_filter_func(pane))
+            pane.library.set_sort_func(self.sort_func)
 
         self.set_library_child()
 
@@ -235,105 +290,112 @@ class CartridgesWindow(Adw.ApplicationWindow):
         if shared.PROFILE == "development":
             self.add_css_class("devel")
 
+        # Relative dates drift with the clock, so refresh the cached labels hourly
+        GLib.timeout_add_seconds(3600, self.reset_date_labels)
+
         # Connect search entries
-        self.search_bar.connect_entry(self.search_entry)
-        self.hidden_search_bar.connect_entry(self.hidden_search_entry)
+        for pane in self.panes.values():
+            pane.search_bar.connect_entry(pane.search_entry)
+            pane.search_entry.connect("search-changed", self.search_changed, pane)
+            pane.search_entry.connect("activate", self.show_details_page_search, pane)
 
         # Connect signals
-        self.search_entry.connect("search-changed", self.search_changed, False)
-        self.hidden_search_entry.connect("search-changed", self.search_changed, True)
-
-        self.search_entry.connect("activate", self.show_details_page_search)
-        self.hidden_search_entry.connect("activate", self.show_details_page_search)
-
-        self.navigation_view.connect("popped", self.set_show_hidden)
-        self.navigation_view.connect("pushed", self.set_show_hidden)
+        self.visible_page = self.navigation_view.get_visible_page()
+        self.navigation_view.connect("popped", self.visible_page_changed)
+        self.navigation_view.connect("pushed", self.visible_page_changed)
 
         self.sidebar.connect("row-selected", self.row_selected)
 
-        style_manager = Adw.StyleManager.get_default()
-        style_manager.connect("notify::dark", self.set_details_view_opacity)
-        style_manager.connect("notify::high-contrast", self.set_details_view_opacity)
+        self.style_manager = Adw.StyleManager.get_default()
 
         # Allow for a custom number of rows for the library
         if shared.schema.get_uint("library-rows"):
-            shared.schema.bind(
-                "library-rows",
-                self.library,
-                "max-children-per-line",
-                Gio.SettingsBindFlags.DEFAULT,
-            )
-            shared.schema.bind(
-                "library-rows",
-                self.hidden_library,
-                "max-children-per-line",
-                Gio.SettingsBindFlags.DEFAULT,
-            )
+            for pane in self.panes.values():
+                shared.schema.bind(
+                    "library-rows",
+                    pane.library,
+                    "max-children-per-line",
+                    Gio.SettingsBindFlags.DEFAULT,
+                )
 
-    def search_changed(self, _widget: Any, hidden: bool) -> None:
+    def search_changed(self, widget: Any, pane: LibraryPane) -> None:
         # Refresh search filter on keystroke in search box
-        (self.hidden_library if hidden else self.library).invalidate_filter()
+        text = widget.get_text().casefold()
 
-    def set_library_child(self) -> None:
-        child, hidden_child = self.notice_empty, self.hidden_notice_empty
+        # IME composition and dead keys can emit search-changed without
+        # changing the effective text; don't schedule a filter pass then
+        if text == pane.search_text:
+            return
 
-        for game in shared.store:
-            if game.removed or game.blacklisted:
-                continue
-            if game.hidden:
-                if game.filtered and hidden_child:
-                    hidden_child = self.hidden_notice_no_results
-                    continue
-                hidden_child = None
-            else:
-                if game.filtered and child:
-                    child = self.notice_no_results
-                    continue
-                child = None
+        pane.search_text = text
+
+        # Coalesce bursts of keystrokes into one filter pass, run between
+        # frames so it doesn't preempt input handling or drawing
+        if pane.search_timeout_id:
+            GLib.source_remove(pane.search_timeout_id)
+        pane.search_timeout_id = GLib.timeout_add(
+            120, self.apply_search_filter, pane, priority=GLib.PRIORITY_DEFAULT_IDLE
+        )
 
+    def apply_search_filter(self, pane: LibraryPane) -> bool:
+        pane.search_timeout_id = 0
+
+        pane.library.invalidate_filter()
+        self.set_library_child(pane)
+
+        return GLib.SOURCE_REMOVE
+
+    def set_library_child(self, pane: Optional[LibraryPane] = None) -> None:
         def remove_from_overlay(widget: Gtk.Widget) -> None:
             if isinstance(widget.get_parent(), Gtk.Overlay):
                 widget.get_parent().remove_overlay(widget)
 
-        if child:
-            self.library_overlay.add_overlay(child)
-        else:
-            remove_from_overlay(self.notice_empty)
-            remove_from_overlay(self.notice_no_results)
+        panes = (pane,) if pane else self.panes.values()
 
-        if hidden_child:
-            self.hidden_library_overlay.add_overlay(hidden_child)
-        else:
-            remove_from_overlay(self.hidden_notice_empty)
-            remove_from_overlay(self.hidden_notice_no_results)
-
-    def filter_func(self, child: Gtk.Widget) -> bool:
-        game = child.get_child()
-        text = (
-            (
-                self.hidden_search_entry
-                if self.navigation_view.get_visible_page() == self.hidden_library_page
-                else self.search_entry
+        for current in panes:
+            child = (
+                None
+                if current.games_no > current.filtered_no
+                else current.notice_no_results
+                if current.games_no
+                else current.notice_empty
             )
-            .get_text()
-            .lower()
-        )
 
-        filtered = text != "" and not (
-            text in game.name.lower()
-            or (text in game.developer.lower() if game.developer else False)
-        )
+            for notice in (current.notice_empty, current.notice_no_results):
+                if notice is not child:
+                    remove_from_overlay(notice)
+            if child and not child.get_parent():
+                current.overlay.add_overlay(child)
+
+    def make_filter_func(self, pane: LibraryPane) -> Callable[[Gtk.Widget], bool]:
+        # Bind the pane into a closure so the per-child callback doesn't have
+        # to look up which library it is filtering
+        def filter_func(child: Gtk.Widget) -> bool:
+            game = child.get_child()
+            text = pane.search_text
+
+            filtered = text != "" and not (
+                text in game.name_casefold
+                or (
+                    text in game.developer_casefold
+                    if game.developer_casefold
+                    else False
+                )
+            )
 
-        if not filtered:
-            if self.filter_state == "all":
-                pass
-            elif game.base_source != self.filter_state:
-                filtered = True
+            if not filtered:
+                if self.filter_state == "all":
+                    pass
+                elif game.base_source != self.filter_state:
+                    filtered = True
 
-        game.filtered = filtered
-        self.set_library_child()
+            if filtered != game.filtered:
+                game.filtered = filtered
+                pane.filtered_no += 1 if filtered else -1
+
+            return not filtered
 
-        return not filtered
+        return filter_func
 
     def set_active_game(self, _widget: Any, _pspec: Any, game: Game) -> None:
         self.active_game = game
@@ -367,68 +429,71 @@ class CartridgesWindow(Adw.ApplicationWindow):
         self.details_view_title.set_label(game.name)
         self.details_page.set_title(game.name)
 
-        date = relative_date(game.added)
-        self.details_view_added.set_label(
-            # The variable is the date when the game was added
-            _("Added: {}").format(date)
-        )
-        last_played_date = (
-            relative_date(game.last_played) if game.last_played else _("Never")
-        )
-        self.details_view_last_played.set_label(
-            # The variable is the date when the game was last played
-            _("Last played: {}").format(last_played_date)
-        )
+        self.details_view_added.set_label(game.added_label)
+        self.details_view_last_played.set_label(game.last_played_label)
 
-        if self.navigation_view.get_visible_page() != self.details_page:
+        if self.visible_page != self.details_page:
             self.navigation_view.push(self.details_page)
             self.set_focus(self.details_view_play_button)
 
         self.set_details_view_opacity()
 
     def set_details_view_opacity(self, *_args: Any) -> None:
-        if self.navigation_view.get_visible_page() != self.details_page:
+        if self.visible_page != self.details_page:
             return
 
+        style_manager = self.style_manager
         if (
-            style_manager := Adw.StyleManager.get_default()
-        ).get_high_contrast() or not style_manager.get_system_supports_color_schemes():
+            style_manager.get_high_contrast()
+            or not style_manager.get_system_supports_color_schemes()
+        ):
             self.details_view_blurred_cover.set_opacity(0.3)
             return
 
+        luminance = self.details_view_game_cover.luminance  # type: ignore
         self.details_view_blurred_cover.set_opacity(
-            1 - self.details_view_game_cover.luminance[0]  # type: ignore
-            if style_manager.get_dark()
-            else self.details_view_game_cover.luminance[1]  # type: ignore
+            (luminance[1], 1 - luminance[0])[style_manager.get_dark()]
         )
 
     def sort_func(self, child1: Gtk.Widget, child2: Gtk.Widget) -> int:
-        var, order = "name", True
+        if self.sort_reversed:
+            child1, child2 = child2, child1
 
-        if self.sort_state in ("newest", "oldest"):
-            var, order = "added", self.sort_state == "newest"
-        elif self.sort_state == "last_played":
-            var = "last_played"
-        elif self.sort_state == "a-z":
-            order = False
+        key1 = self.sort_key(child1.get_child())
+        key2 = self.sort_key(child2.get_child())
 
-        def get_value(index: int) -> str:
-            return (
-                str(getattr((child1.get_child(), child2.get_child())[index], var))
-                .lower()
-                .removeprefix("the ")
-            )
+        return -1 if key1 < key2 else 1 if key1 > key2 else 0
 
-        if var != "name" and get_value(0) == get_value(1):
-            var, order = "name", False
+    def reset_date_labels(self) -> bool:
+        for game in shared.store:
+            game.reset_date_labels()
 
-        return ((get_value(0) > get_value(1)) ^ order) * 2 - 1
+        return GLib.SOURCE_CONTINUE
 
-    def set_show_hidden(self, navigation_view: Adw.NavigationView, *_args: Any) -> None:
+    def visible_page_changed(
+        self, navigation_view: Adw.NavigationView, *_args: Any
+    ) -> None:
+        self.visible_page = navigation_view.get_visible_page()
         self.lookup_action("show_hidden").set_enabled(
-            navigation_view.get_visible_page() == self.library_page
+            self.visible_page == self.library_page
         )
 
+        # Only follow style changes while the details view can show them
+        if self.visible_page == self.details_page:
+            if not self.style_handlers:
+                self.style_handlers = (
+                    self.style_manager.connect(
+                        "notify::dark", self.set_details_view_opacity
+                    ),
+                    self.style_manager.connect(
+                        "notify::high-contrast", self.set_details_view_opacity
+                    ),
+                )
+        elif self.style_handlers:
+            for handler_id in self.style_handlers:
+                self.style_manager.disconnect(handler_id)
+            self.style_handlers = ()
+
     def on_show_sidebar_action(self, *_args: Any) -> None:
         shared.state_schema.set_boolean(
             "show-sidebar", (value := not self.overlay_split_view.get_show_sidebar())
@@ -436,7 +501,7 @@ class CartridgesWindow(Adw.ApplicationWindow):
         self.overlay_split_view.set_show_sidebar(value)
 
     def on_go_to_parent_action(self, *_args: Any) -> None:
-        if self.navigation_view.get_visible_page() == self.details_page:
+        if self.visible_page == self.details_page:
             self.navigation_view.pop()
 
     def on_go_home_action(self, *_args: Any) -> None:
@@ -447,39 +512,36 @@ class CartridgesWindow(Adw.ApplicationWindow):
 
     def on_sort_action(self, action: Gio.SimpleAction, state: GLib.Variant) -> None:
         action.set_state(state)
-        self.sort_state = str(state).strip("'")
+        self.sort_state = state.get_string()
+        self.sort_key = self.sort_keys[self.sort_state]
+        self.sort_reversed = self.sort_state == "z-a"
         self.library.invalidate_sort()
 
         shared.state_schema.set_string("sort-mode", self.sort_state)
 
     def on_toggle_search_action(self, *_args: Any) -> None:
-        if self.navigation_view.get_visible_page() == self.library_page:
-            search_bar = self.search_bar
-            search_entry = self.search_entry
-        elif self.navigation_view.get_visible_page() == self.hidden_library_page:
-            search_bar = self.hidden_search_bar
-            search_entry = self.hidden_search_entry
-        else:
+        if not (pane := self.panes.get(self.visible_page)):
             return
 
-        search_bar.set_search_mode(not (search_mode := search_bar.get_search_mode()))
+        pane.search_bar.set_search_mode(
+            not (search_mode := pane.search_bar.get_search_mode())
+        )
 
         if not search_mode:
-            self.set_focus(search_entry)
+            self.set_focus(pane.search_entry)
 
-        search_entry.set_text("")
+        pane.search_entry.set_text("")
 
-    def show_details_page_search(self, widget: Gtk.Widget) -> None:
-        library = (
-            self.hidden_library if widget == self.hidden_search_entry else self.library
-        )
-        index = 0
+    def show_details_page_search(self, _widget: Any, pane: LibraryPane) -> None:
+        # Apply any filter pass still pending from the debounce
+        if pane.search_timeout_id:
+            GLib.source_remove(pane.search_timeout_id)
+            self.apply_search_filter(pane)
 
-        while True:
-            if not (child := library.get_child_at_index(index)):
-                break
+        index = 0
 
-            if self.filter_func(child):
+        while child := pane.library.get_child_at_index(index):
+            if not child.get_child().filtered:
                 self.show_details_page(child.get_child())
                 break
 
@@ -496,9 +558,8 @@ class CartridgesWindow(Adw.ApplicationWindow):
                 return
 
             try:
-                game = tuple(self.toasts.keys())[-1][0]
-                undo = tuple(self.toasts.keys())[-1][1]
-            except IndexError:
+                game, undo = next(reversed(self.toasts))
+            except StopIteration:
                 return
 
         if game:
@@ -514,10 +575,8 @@ class CartridgesWindow(Adw.ApplicationWindow):
             self.toasts.pop((game, undo))
 
     def on_open_menu_action(self, *_args: Any) -> None:
-        if self.navigation_view.get_visible_page() == self.library_page:
-            self.primary_menu_button.popup()
-        elif self.navigation_view.get_visible_page() == self.hidden_library_page:
-            self.hidden_primary_menu_button.popup()
+        if pane := self.panes.get(self.visible_page):
+            pane.menu_button.popup()
 
     def on_close_action(self, *_args: Any) -> None:
         self.close()